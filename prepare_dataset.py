@@ -0,0 +1,220 @@
+from tqdm import tqdm
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+bar_format = "{l_bar}{bar}|"
+
+# Layout expected by the tesstrain Makefile: data/<MODEL_NAME>-ground-truth
+model_name = "Meditech"
+tesstrain_dir = "tesstrain"
+tessdata_dir = "tessdata"
+
+# Same defaults as the tesstrain Makefile (PSM, RATIO_TRAIN)
+psm = 13
+ratio_train = 0.90
+
+manifest_name = "prepare-manifest.json"
+
+# Save the manifest every N conversions so an interrupted run keeps its progress
+manifest_save_interval = 100
+
+def file_signature(path):
+    """Return a cheap signature (size, mtime) used to detect changed inputs."""
+    stat = os.stat(path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+def find_samples(ground_truth_dir):
+    """Return the sorted base names of every .tif/.box/.gt.txt sample in the ground truth directory."""
+    samples = []
+    for name in os.listdir(ground_truth_dir):
+        base, ext = os.path.splitext(name)
+        if ext == ".tif" and all(
+            os.path.exists(os.path.join(ground_truth_dir, base + suffix)) for suffix in (".box", ".gt.txt")
+        ):
+            samples.append(base)
+    return sorted(samples)
+
+def sample_signature(ground_truth_dir, sample, psm):
+    """Signature of everything the .lstmf of a sample depends on."""
+    base = os.path.join(ground_truth_dir, sample)
+    return {
+        'tif': file_signature(base + ".tif"),
+        'box': file_signature(base + ".box"),
+        'gt': file_signature(base + ".gt.txt"),
+        'psm': psm,
+    }
+
+def load_manifest(path):
+    """Load the manifest of already converted samples, or an empty one."""
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        tqdm.write(f"Ignoring unreadable manifest {path}")
+        return {}
+
+def save_manifest(path, manifest):
+    """Persist the manifest of converted samples."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    write_file(path, json.dumps(manifest, indent=1, sort_keys=True))
+
+def write_file(path, content):
+    """Write a file atomically so an interrupted run never leaves it half written."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+def convert_sample(ground_truth_dir, sample, psm, tessdata_dir):
+    """Convert a .tif/.box pair into .lstmf (same command as the tesstrain Makefile)."""
+    base = os.path.join(ground_truth_dir, sample)
+
+    # Tesseract can exit 0 without writing output, so a stale .lstmf must not pass for a new one
+    if os.path.exists(base + ".lstmf"):
+        os.remove(base + ".lstmf")
+
+    command = ["tesseract", base + ".tif", base, "--psm", str(psm)]
+    if tessdata_dir:
+        command += ["--tessdata-dir", tessdata_dir]
+    command.append("lstm.train")
+
+    # One OpenMP thread per tesseract, the pool already uses every core
+    env = {**os.environ, "OMP_THREAD_LIMIT": "1"}
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True, env=env)
+    except OSError as e:
+        return (sample, str(e))
+    if result.returncode != 0:
+        return (sample, result.stderr.strip() or f"tesseract exited with {result.returncode}")
+    if not os.path.exists(base + ".lstmf"):
+        details = result.stderr.strip()
+        return (sample, f"no .lstmf written: {details}" if details else "no .lstmf written")
+    return (sample, None)
+
+def is_train_sample(sample, ratio_train):
+    """Deterministically assign a sample to the train or eval list.
+
+    The split depends only on the sample name, so adding samples never moves
+    existing ones between the lists.
+    """
+    return split_bucket(sample) < ratio_train * 10000
+
+def split_bucket(sample):
+    """Stable bucket in [0, 10000) derived from the sample name."""
+    digest = hashlib.sha1(sample.encode("utf-8")).hexdigest()
+    return int(digest, 16) % 10000
+
+def list_order(sample):
+    """Stable pseudo-random sort key, so the lists stay shuffled like the Makefile's shuffle.py output."""
+    return hashlib.sha1(f"order:{sample}".encode("utf-8")).hexdigest()
+
+def write_lists(samples, ground_truth_dir, model_dir, tesstrain_dir, ratio_train):
+    """Write all-lstmf, list.train and list.eval relative to the tesstrain folder."""
+    lstmf_dir = os.path.relpath(ground_truth_dir, tesstrain_dir)
+
+    # lstmtraining reads the lists in order, so mix the sample types instead of using name order
+    samples = sorted(samples, key=list_order)
+
+    train, evaluation = [], []
+    for sample in samples:
+        (train if is_train_sample(sample, ratio_train) else evaluation).append(sample)
+
+    # lstmtraining needs at least one eval sample, like the Makefile's head/tail split gives it
+    if ratio_train < 1 and samples and not evaluation:
+        if len(train) < 2:
+            raise ValueError("At least 2 converted samples are needed to split train and eval lists")
+        closest = max(train, key=split_bucket)
+        train.remove(closest)
+        evaluation.append(closest)
+
+    os.makedirs(model_dir, exist_ok=True)
+    for name, names in (("all-lstmf", samples), ("list.train", train), ("list.eval", evaluation)):
+        lines = "".join(os.path.join(lstmf_dir, sample + ".lstmf") + "\n" for sample in names)
+        write_file(os.path.join(model_dir, name), lines)
+
+    return len(train), len(evaluation)
+
+def prepare_dataset(ground_truth_dir, model_dir, tesstrain_dir, jobs, psm, ratio_train, tessdata_dir, force):
+    """Convert new or changed samples to .lstmf and refresh the training lists."""
+    manifest_path = os.path.join(model_dir, manifest_name)
+    manifest = {} if force else load_manifest(manifest_path)
+
+    samples = find_samples(ground_truth_dir)
+    signatures = {sample: sample_signature(ground_truth_dir, sample, psm) for sample in samples}
+
+    # Drop samples that no longer exist in the ground truth directory
+    manifest = {sample: signature for sample, signature in manifest.items() if sample in signatures}
+
+    pending = [
+        sample for sample in samples
+        if manifest.get(sample) != signatures[sample]
+        or not os.path.exists(os.path.join(ground_truth_dir, sample + ".lstmf"))
+    ]
+    print(f"{len(samples)} samples found, {len(samples) - len(pending)} up to date, {len(pending)} to convert")
+
+    if pending and not shutil.which("tesseract"):
+        raise SystemExit("tesseract was not found in PATH")
+
+    failed = set()
+    try:
+        if pending:
+            with tqdm(total=len(pending), desc="Converting to lstmf", bar_format=bar_format) as progress_bar:
+                # Each worker runs one tesseract at a time, like make -j in tesstrain
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    futures = [
+                        executor.submit(convert_sample, ground_truth_dir, sample, psm, tessdata_dir)
+                        for sample in pending
+                    ]
+
+                    for done, future in enumerate(as_completed(futures), start=1):
+                        sample, error = future.result()
+                        if error:
+                            failed.add(sample)
+                            manifest.pop(sample, None)
+                            tqdm.write(f"Error with sample {sample}: {error}")
+                        else:
+                            manifest[sample] = signatures[sample]
+                        progress_bar.update(1)
+
+                        if done % manifest_save_interval == 0:
+                            save_manifest(manifest_path, manifest)
+    finally:
+        save_manifest(manifest_path, manifest)
+
+    converted = [sample for sample in samples if sample in manifest]
+    train_count, eval_count = write_lists(converted, ground_truth_dir, model_dir, tesstrain_dir, ratio_train)
+    print(f"list.train: {train_count} samples, list.eval: {eval_count} samples")
+
+    return failed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-m", required=False, type=str, help="Model name used by tesstrain", default=model_name)
+    parser.add_argument("-t", required=False, type=str, help="Path to the tesstrain folder", default=tesstrain_dir)
+    parser.add_argument("-i", required=False, type=str, help="Ground truth directory (defaults to <tesstrain>/data/<model>-ground-truth)")
+    parser.add_argument("-j", required=False, type=int, help="Number of parallel conversion jobs (defaults to the CPU count)")
+    parser.add_argument("-psm", required=False, type=int, help="Tesseract page segmentation mode", default=psm)
+    parser.add_argument("-r", required=False, type=float, help="Ratio of samples used for training", default=ratio_train)
+    parser.add_argument("-tessdata", required=False, type=str, help="Tessdata directory with the lstm.train config", default=tessdata_dir)
+    parser.add_argument("-f", required=False, help="Ignore the manifest and convert every sample", action="store_true")
+    args = parser.parse_args()
+
+    if args.j is not None and args.j < 1:
+        raise ValueError("Jobs must be greater than 0")
+    if not 0 < args.r <= 1:
+        raise ValueError("Train ratio must be between 0 and 1")
+
+    ground_truth_dir = args.i or os.path.join(args.t, "data", f"{args.m}-ground-truth")
+    model_dir = os.path.join(args.t, "data", args.m)
+    tessdata = os.path.abspath(args.tessdata) if args.tessdata else None
+
+    failed = prepare_dataset(ground_truth_dir, model_dir, args.t, args.j, args.psm, args.r, tessdata, args.f)
+    if failed:
+        raise SystemExit(f"{len(failed)} samples failed to convert")